@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """Tests near 100% code coverage"""
-# pylint: disable=missing-function-docstring, global-statement
+# pylint: disable=missing-function-docstring
 
 import sys
+import math
 import time
+import itertools
+from functools import partial
+from types import SimpleNamespace
 
 import pytest
 
@@ -17,73 +21,94 @@ from dvg_qdeviceio import QDeviceIO, DAQ_TRIGGER
 # Show extra debug info in terminal?
 DEBUG = True
 
-# GLobals
-cnt_DAQ_updated = 0
-cnt_jobs_updated = 0
-cnt_DAQ_paused = 0
+# Signal counters. Incremented as attributes, so no `global` statements are
+# needed inside the slots.
+cnt = SimpleNamespace(DAQ_updated=0, jobs_updated=0, DAQ_paused=0)
 
-# NOTE: The global 'go' mechanism used here is a quick and dirty way to
-# pytest. In production, it should be implemented by an boolean external
-# class member.
-go = True
+# The counter slots below touch no Qt objects, so they can safely run directly
+# inside the emitting worker thread instead of being queued to the main thread.
+# Each counter is only ever incremented by a single worker thread. Because the
+# slots run as part of each update, every update has been counted by the time
+# `qdev.quit()` returns, so the tests can assert exact counts.
+DIRECT = QtCore.Qt.ConnectionType.DirectConnection
 
 
 @Slot()
 def process_DAQ_updated():
     # In production code, your GUI update routine would go here
-    tprint("---> received: DAQ_updated")
-    global cnt_DAQ_updated
-    cnt_DAQ_updated += 1
+    if DEBUG:
+        tprint("---> received: DAQ_updated")
+    cnt.DAQ_updated += 1
 
 
 @Slot()
 def process_DAQ_paused():
     # In production code, your GUI update routine would go here
-    tprint("---> received: DAQ_paused")
-    global cnt_DAQ_paused
-    cnt_DAQ_paused += 1
+    if DEBUG:
+        tprint("---> received: DAQ_paused")
+    cnt.DAQ_paused += 1
 
 
 @Slot()
 def process_jobs_updated():
     # In production code, your GUI update routine would go here
-    tprint("---> received: jobs_updated")
-    global cnt_jobs_updated
-    cnt_jobs_updated += 1
+    if DEBUG:
+        tprint("---> received: jobs_updated")
+    cnt.jobs_updated += 1
 
 
 class FakeDevice:
-    def __init__(self, start_alive=True):
+    # Simulated latency of a failing I/O operation. Set to e.g. 0.1 for a
+    # more realistic, but slower, interactive debug run.
+    fail_delay_s = 0.0
+
+    def __init__(self, start_alive=True, debug=DEBUG):
         self.name = "FakeDev"
         self.is_alive = start_alive
+        self.debug = debug
 
         # Member for testing
         self.count_commands = 0
         self.count_replies = 0
+        self._cmd_ctr = itertools.count(1)
+        self._reply_ctr = itertools.count(1)
 
     def _send(self, data_to_be_send):
         if self.is_alive:
             # Simulate successful device output
-            self.count_replies += 1
-            tprint_tab(data_to_be_send)
+            self.count_replies = next(self._reply_ctr)
+            if self.debug:
+                tprint_tab(data_to_be_send)
             return data_to_be_send
 
         # Simulate device failure
-        time.sleep(0.1)
-        tprint_tab("SIMULATED I/O ERROR")
+        if self.fail_delay_s:
+            time.sleep(self.fail_delay_s)
+        if self.debug:
+            tprint_tab("SIMULATED I/O ERROR")
         return "SIMULATED I/O ERROR"
 
     def fake_query_1(self):
-        self.count_commands += 1
+        self.count_commands = next(self._cmd_ctr)
         return self._send("-> reply 0101")
 
     def fake_query_2(self):
-        self.count_commands += 1
+        self.count_commands = next(self._cmd_ctr)
         return self._send("-> reply ~~~~")
 
     def fake_command_with_argument(self, val: int):
-        self.count_commands += 1
-        tprint_tab(f"-> command(arg={val:d})")
+        self.count_commands = next(self._cmd_ctr)
+        if not isinstance(val, int):
+            raise TypeError(f"Argument `val` must be an int, not {val!r}")
+        if self.debug:
+            tprint_tab(f"-> command(arg={val:d})")
+
+
+def DAQ_function_query_1(dev: FakeDevice) -> bool:
+    """`DAQ_function` shared by several tests. Bind `dev` to it using
+    `functools.partial`. Must return True when successful, False otherwise.
+    """
+    return dev.fake_query_1().endswith("0101")
 
 
 def create_QApplication() -> QtCore.QCoreApplication:
@@ -101,14 +126,25 @@ def create_QApplication() -> QtCore.QCoreApplication:
     if app is None:
         sys.exit(0)
 
-    global cnt_DAQ_updated, cnt_DAQ_paused, cnt_jobs_updated
-    cnt_DAQ_updated = 0
-    cnt_DAQ_paused = 0
-    cnt_jobs_updated = 0
-
     return app
 
 
+@pytest.fixture(scope="session")
+def qapp() -> QtCore.QCoreApplication:
+    """Single `QCoreApplication` shared by all tests of the session. Qt only
+    supports one instance per process. Tests request it via
+    `pytest.mark.usefixtures` merely to ensure it exists before any `QDeviceIO`
+    gets created.
+    """
+    return create_QApplication()
+
+
+def reset_counters():
+    cnt.DAQ_updated = 0
+    cnt.DAQ_paused = 0
+    cnt.jobs_updated = 0
+
+
 def print_title(title):
     dprint(f"\n{title}", ANSI.PURPLE)
     dprint("-" * 50, ANSI.PURPLE)
@@ -118,72 +154,113 @@ def tprint_tab(str_msg):
     dprint(" " * 60 + f"{time.perf_counter():.4f} {str_msg}")
 
 
+def run_event_loop(duration_ms: int, stop_condition=None):
+    """Run the Qt event loop of the main thread for `duration_ms` milliseconds,
+    or shorter when the optional `stop_condition()` evaluates to True. The
+    condition gets checked every 10 ms. Tests driven by `schedule()` should
+    include `not timer.isActive()` in their condition, so that no scheduled
+    event gets skipped.
+
+    Tests that start with a dead device pass a short `duration_ms`, because
+    the workers never get started and no device I/O can happen anyway.
+    """
+    loop = QtCore.QEventLoop()
+
+    deadline_timer = QtCore.QTimer()
+    deadline_timer.setSingleShot(True)
+    deadline_timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+    deadline_timer.timeout.connect(loop.quit)
+
+    check_timer = QtCore.QTimer()
+    check_timer.setInterval(10)
+    if stop_condition is not None:
+        check_timer.timeout.connect(
+            lambda: loop.quit() if stop_condition() else None
+        )
+        check_timer.start()
+
+    deadline_timer.start(duration_ms)
+    loop.exec_()
+
+    check_timer.stop()
+    deadline_timer.stop()
+
+
+def schedule(events: list) -> QtCore.QTimer:
+    """Fire the callables in `events`, a list of `(delay_ms, callable)` tuples
+    sorted by delay, all driven by a single `QTimer` instead of by a separate
+    `QTimer.singleShot()` per event. Keep a reference to the returned timer
+    for as long as the events should fire.
+    """
+    events = list(events)
+    stopwatch = QtCore.QElapsedTimer()
+    timer = QtCore.QTimer()
+    timer.setSingleShot(True)
+    timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+
+    def fire():
+        while events and events[0][0] <= stopwatch.elapsed():
+            events.pop(0)[1]()
+        if events:
+            timer.start(max(0, events[0][0] - stopwatch.elapsed()))
+
+    timer.timeout.connect(fire)
+    stopwatch.start()
+    timer.start(events[0][0])
+    return timer
+
+
 # ------------------------------------------------------------------------------
 # ------------------------------------------------------------------------------
 
 
-def test_Worker_DAQ___INTERNAL_TIMER(start_alive=True):
+@pytest.mark.usefixtures("qapp")
+@pytest.mark.parametrize("start_alive", [True, False])
+def test_Worker_DAQ___INTERNAL_TIMER(start_alive):
     print_title(
         "Worker_DAQ - INTERNAL_TIMER" + ("" if start_alive else " - start dead")
     )
 
-    def DAQ_function():
-        # Must return True when successful, False otherwise
-        reply = dev.fake_query_1()
-        return reply[-4:] == "0101"
-
-    app = create_QApplication()
+    reset_counters()
     dev = FakeDevice(start_alive=start_alive)
+    DAQ_function = partial(DAQ_function_query_1, dev)
     qdev = QDeviceIO(dev)
     # fmt: off
     qdev.create_worker_DAQ(
         DAQ_trigger                = DAQ_TRIGGER.INTERNAL_TIMER,
         DAQ_function               = DAQ_function,
-        DAQ_interval_ms            = 100,
+        DAQ_interval_ms            = 20,
         critical_not_alive_count   = 10,
         debug                      = DEBUG)
     # fmt: on
-    qdev.signal_DAQ_updated.connect(process_DAQ_updated)
+    qdev.signal_DAQ_updated.connect(process_DAQ_updated, DIRECT)
     assert qdev.start() == start_alive
 
     # Simulate device runtime
-    start_time = time.perf_counter()
-    while time.perf_counter() - start_time < 1:
-        app.processEvents()
-        if dev.count_commands == 3:
-            break
-        time.sleep(0.001)  # Do not hog the CPU
+    run_event_loop(
+        1000 if start_alive else 50, lambda: dev.count_commands >= 3
+    )
 
     tprint("About to quit")
-    app.processEvents()
     assert qdev.quit() is True
-    app.quit()
 
     if start_alive:
         assert dev.count_commands >= 3
         assert dev.count_replies >= 3
-        assert (
-            cnt_DAQ_updated >= 2
-        )  # Last signal is not always received before thread is quit
-
-
-def test_Worker_DAQ___INTERNAL_TIMER__start_dead():
-    test_Worker_DAQ___INTERNAL_TIMER(start_alive=False)
+        assert cnt.DAQ_updated == dev.count_commands
 
 
-def test_Worker_DAQ___SINGLE_SHOT_WAKE_UP(start_alive=True):
+@pytest.mark.usefixtures("qapp")
+@pytest.mark.parametrize("start_alive", [True, False])
+def test_Worker_DAQ___SINGLE_SHOT_WAKE_UP(start_alive):
     print_title(
         "Worker_DAQ - SINGLE_SHOT_WAKE_UP"
         + ("" if start_alive else " - start dead")
     )
 
-    def DAQ_function():
-        # Must return True when successful, False otherwise
-        reply = dev.fake_query_1()
-        return reply[-4:] == "0101"
-
-    app = create_QApplication()
+    reset_counters()
     dev = FakeDevice(start_alive=start_alive)
+    DAQ_function = partial(DAQ_function_query_1, dev)
     qdev = QDeviceIO(dev)
     # fmt: off
     qdev.create_worker_DAQ(
@@ -192,48 +269,44 @@ def test_Worker_DAQ___SINGLE_SHOT_WAKE_UP(start_alive=True):
         critical_not_alive_count   = 1,
         debug                      = DEBUG)
     # fmt: on
-    qdev.signal_DAQ_updated.connect(process_DAQ_updated)
+    qdev.signal_DAQ_updated.connect(process_DAQ_updated, DIRECT)
     assert qdev.start() == start_alive
 
     # Immediately fire a call to test if the worker is ready for it
     qdev.wake_up_DAQ()
 
     # Simulate device runtime
-    start_time = time.perf_counter()
-    QtCore.QTimer.singleShot(300, qdev.wake_up_DAQ)
-    QtCore.QTimer.singleShot(600, qdev.wake_up_DAQ)
-    while time.perf_counter() - start_time < 1:
-        app.processEvents()
-        time.sleep(0.001)  # Do not hog the CPU
+    timer = schedule([(60, qdev.wake_up_DAQ), (120, qdev.wake_up_DAQ)])
+    run_event_loop(
+        200 if start_alive else 50,
+        lambda: not timer.isActive() and cnt.DAQ_updated >= 3,
+    )
+    timer.stop()
 
     tprint("About to quit")
-    app.processEvents()
     assert qdev.quit() is True
-    app.quit()
 
     if start_alive:
         assert dev.count_commands == 3
         assert dev.count_replies == 3
-        assert cnt_DAQ_updated == 3
+        assert cnt.DAQ_updated == 3
 
 
-def test_Worker_DAQ___SINGLE_SHOT_WAKE_UP__start_dead():
-    test_Worker_DAQ___SINGLE_SHOT_WAKE_UP(start_alive=False)
-
-
-def test_Worker_DAQ___CONTINUOUS(start_alive=True):
+@pytest.mark.usefixtures("qapp")
+@pytest.mark.parametrize("start_alive", [True, False])
+def test_Worker_DAQ___CONTINUOUS(start_alive):
     print_title(
         "Worker_DAQ - CONTINUOUS" + ("" if start_alive else " - start dead")
     )
 
+    reset_counters()
+    dev = FakeDevice(start_alive=start_alive)
+
     def DAQ_function():
         # Must return True when successful, False otherwise
-        time.sleep(0.1)  # Simulate blocking processing time on the device
-        reply = dev.fake_query_1()
-        return reply[-4:] == "0101"
+        time.sleep(0.02)  # Simulate blocking processing time on the device
+        return dev.fake_query_1().endswith("0101")
 
-    app = create_QApplication()
-    dev = FakeDevice(start_alive=start_alive)
     qdev = QDeviceIO(dev)
     # fmt: off
     qdev.create_worker_DAQ(
@@ -244,93 +317,98 @@ def test_Worker_DAQ___CONTINUOUS(start_alive=True):
     )
     # fmt: on
 
-    qdev.signal_DAQ_updated.connect(process_DAQ_updated)
-    qdev.signal_DAQ_paused.connect(process_DAQ_paused)
+    qdev.signal_DAQ_updated.connect(process_DAQ_updated, DIRECT)
+    qdev.signal_DAQ_paused.connect(process_DAQ_paused, DIRECT)
 
     assert qdev.start() == start_alive
 
     # Immediately fire a call to test if the worker is ready for it
     qdev.unpause_DAQ()
 
+    # fmt: off
     # Simulate device runtime
-    start_time = time.perf_counter()
-    QtCore.QTimer.singleShot(300, qdev.pause_DAQ)
-    QtCore.QTimer.singleShot(600, qdev.unpause_DAQ)
-    QtCore.QTimer.singleShot(900, qdev.pause_DAQ)
-    QtCore.QTimer.singleShot(1200, qdev.unpause_DAQ)
-    while time.perf_counter() - start_time < 1.6:
-        app.processEvents()
-        if dev.count_commands == 12:
-            break
-        time.sleep(0.001)  # Do not hog the CPU
+    timer = schedule([
+        (60, qdev.pause_DAQ),
+        (120, qdev.unpause_DAQ),
+        (180, qdev.pause_DAQ),
+        (240, qdev.unpause_DAQ),
+    ])
+    # fmt: on
+    run_event_loop(
+        400 if start_alive else 50, lambda: dev.count_commands >= 12
+    )
+    timer.stop()
 
     tprint("About to quit")
-    app.processEvents()
     assert qdev.quit() is True
-    app.quit()
 
     if start_alive:
         assert dev.count_commands >= 10
         assert dev.count_replies >= 10
-        assert (
-            cnt_DAQ_updated >= 9
-        )  # Last signal is not always received before thread is quit
-        assert cnt_DAQ_paused == 3
-
-
-def test_Worker_DAQ___CONTINUOUS__start_dead():
-    test_Worker_DAQ___CONTINUOUS(start_alive=False)
+        assert cnt.DAQ_updated == dev.count_commands
+        assert cnt.DAQ_paused == 3
 
 
-def test_Worker_jobs(start_alive=True):
+@pytest.mark.usefixtures("qapp")
+@pytest.mark.parametrize("start_alive", [True, False])
+def test_Worker_jobs(start_alive):
     print_title("Worker_jobs" + ("" if start_alive else " - start dead"))
 
-    app = create_QApplication()
+    reset_counters()
     dev = FakeDevice(start_alive=start_alive)
     qdev = QDeviceIO(dev)
     qdev.create_worker_jobs(debug=DEBUG)
-    qdev.signal_jobs_updated.connect(process_jobs_updated)
+    qdev.signal_jobs_updated.connect(process_jobs_updated, DIRECT)
     assert qdev.start() == start_alive
 
     # Immediately fire a call to test if the worker is ready for it
     qdev.add_to_jobs_queue(dev.fake_query_2)
 
-    # fmt: off
-    # Simulate device runtime
-    start_time = time.perf_counter()
-    QtCore.QTimer.singleShot(100, qdev.process_jobs_queue)
-    QtCore.QTimer.singleShot(200, lambda: qdev.send(dev.fake_query_2))
-    QtCore.QTimer.singleShot(300, lambda: qdev.add_to_jobs_queue(dev.fake_command_with_argument, 0))
-    QtCore.QTimer.singleShot(400, lambda: qdev.add_to_jobs_queue(dev.fake_command_with_argument, 0))
-    QtCore.QTimer.singleShot(500, lambda: qdev.add_to_jobs_queue(dev.fake_command_with_argument, 0))
-    QtCore.QTimer.singleShot(600, qdev.process_jobs_queue)
-    # Trigger an exception because we send a string instead of a callable and we
-    # did not set up our own custom `jobs_function()` to handle such string
-    # messages.
-    QtCore.QTimer.singleShot(700, lambda: qdev.send("trigger_illegal_function_call_error"))
-    # Trigger an exception because the supplied argument `None` is invalid for
-    # function `fake_command_with_argument()`.
-    QtCore.QTimer.singleShot(900, lambda: qdev.send(dev.fake_command_with_argument, None))
-    # fmt: on
-    while time.perf_counter() - start_time < 1.2:
-        app.processEvents()
-        time.sleep(0.001)  # Do not hog the CPU
+    def queue_batch_and_process():
+        # Fill the queue with several jobs first and only then send them all
+        # out to the device in one go
+        for _ in range(3):
+            qdev.add_to_jobs_queue(dev.fake_command_with_argument, 0)
+        qdev.process_jobs_queue()
+
+    steps = [
+        qdev.process_jobs_queue,
+        partial(qdev.send, dev.fake_query_2),
+        queue_batch_and_process,
+        # Trigger an exception because we send a string instead of a callable
+        # and we did not set up our own custom `jobs_function()` to handle such
+        # string messages.
+        partial(qdev.send, "trigger_illegal_function_call_error"),
+        # Trigger an exception because the supplied argument `None` is invalid
+        # for function `fake_command_with_argument()`.
+        partial(qdev.send, dev.fake_command_with_argument, None),
+    ]
+
+    # Simulate device runtime. Each next step waits until the queue drain of
+    # the previous step has been counted. On top of that, every step is
+    # delayed by a fixed 20 ms settle time. This is a delay-based workaround
+    # for a lost-wakeup race in `Worker_jobs`: `_process_queue()` calls
+    # `wakeAll()` without holding the worker's wait mutex, so a wake-up that
+    # arrives before the worker is back inside its wait condition gets lost.
+    # On a very slow runner that would end in a 1 s timeout, followed by a
+    # failing count assertion.
+    for n_drained, step in enumerate(steps, start=1):
+        if start_alive:
+            run_event_loop(20)
+        step()
+        if start_alive:
+            run_event_loop(1000, lambda n=n_drained: cnt.jobs_updated >= n)
 
     tprint("About to quit")
-    app.processEvents()
     assert qdev.quit() is True
-    app.quit()
 
     if start_alive:
         assert dev.count_commands == 6
         assert dev.count_replies == 2
-        assert cnt_jobs_updated == 5
-
-
-def test_Worker_jobs__start_dead():
-    test_Worker_jobs(start_alive=False)
+        assert cnt.jobs_updated == 5
 
 
+@pytest.mark.usefixtures("qapp")
 def test_Worker_jobs__jobs_function():
     print_title("Worker_jobs - jobs_function")
 
@@ -343,14 +421,14 @@ def test_Worker_jobs__jobs_function():
             # args = ("toggle LED",)
             func(*args)
 
-    app = create_QApplication()
+    reset_counters()
     dev = FakeDevice()
     qdev = QDeviceIO(dev)
     qdev.create_worker_jobs(
         jobs_function=jobs_function,
         debug=DEBUG,
     )
-    qdev.signal_jobs_updated.connect(process_jobs_updated)
+    qdev.signal_jobs_updated.connect(process_jobs_updated, DIRECT)
     assert qdev.start() is True
 
     # Immediately fire a call to test if the worker is ready for it
@@ -358,105 +436,79 @@ def test_Worker_jobs__jobs_function():
 
     # fmt: off
     # Simulate device runtime
-    start_time = time.perf_counter()
-    QtCore.QTimer.singleShot(100, lambda: qdev.send("special command"))
-    QtCore.QTimer.singleShot(200, lambda: qdev.send(dev.fake_command_with_argument, 0))
+    timer = schedule([
+        (100, partial(qdev.send, "special command")),
+        (200, partial(qdev.send, dev.fake_command_with_argument, 0)),
+    ])
     # fmt: on
-    while time.perf_counter() - start_time < 0.5:
-        app.processEvents()
-        time.sleep(0.001)  # Do not hog the CPU
+    run_event_loop(
+        500, lambda: not timer.isActive() and dev.count_commands >= 3
+    )
+    timer.stop()
 
     tprint("About to quit")
-    app.processEvents()
     assert qdev.quit() is True
-    app.quit()
 
     assert dev.count_commands == 3
     assert dev.count_replies == 2
-    assert cnt_jobs_updated == 3
-
+    assert cnt.jobs_updated == 3
 
-def test_Worker_DAQ___no_device_attached():
-    print_title("Worker_DAQ - no device attached")
 
-    qdev = QDeviceIO()
-    with pytest.raises(SystemExit) as pytest_wrapped_e:
-        qdev.create_worker_DAQ()
-    assert pytest_wrapped_e.type == SystemExit
-    dprint(f"Exit code: {pytest_wrapped_e.value.code}")
-    assert pytest_wrapped_e.value.code == 99
+# Calls that should exit early: (title, attach device?, method, exit code)
+# fmt: off
+EARLY_EXIT_CASES = [
+    ("Worker_DAQ - no device attached"    , False, "create_worker_DAQ" , 99),
+    ("Worker_jobs - no device attached"   , False, "create_worker_jobs", 99),
+    ("Worker_DAQ - start without create"  , True , "start_worker_DAQ"  , 404),
+    ("Worker_jobs - start without create" , True , "start_worker_jobs" , 404),
+]
+# fmt: on
 
 
-def test_Worker_jobs__no_device_attached():
-    print_title("Worker_jobs - no device attached")
+@pytest.mark.parametrize("title, attach_dev, method, code", EARLY_EXIT_CASES)
+def test_early_exit(title, attach_dev, method, code):
+    print_title(title)
 
-    qdev = QDeviceIO()
+    qdev = QDeviceIO(FakeDevice()) if attach_dev else QDeviceIO()
     with pytest.raises(SystemExit) as pytest_wrapped_e:
-        qdev.create_worker_jobs()
+        getattr(qdev, method)()
     assert pytest_wrapped_e.type == SystemExit
     dprint(f"Exit code: {pytest_wrapped_e.value.code}")
-    assert pytest_wrapped_e.value.code == 99
-
-
-def test_Worker_DAQ___start_without_create():
-    print_title("Worker_DAQ - start without create")
-
-    qdev = QDeviceIO(FakeDevice())
-    with pytest.raises(SystemExit) as pytest_wrapped_e:
-        qdev.start_worker_DAQ()
-    assert pytest_wrapped_e.type == SystemExit
-    dprint(f"Exit code: {pytest_wrapped_e.value.code}")
-    assert pytest_wrapped_e.value.code == 404
-
-
-def test_Worker_jobs__start_without_create():
-    print_title("Worker_jobs - start without create")
-
-    qdev = QDeviceIO(FakeDevice())
-    with pytest.raises(SystemExit) as pytest_wrapped_e:
-        qdev.start_worker_jobs()
-    assert pytest_wrapped_e.type == SystemExit
-    dprint(f"Exit code: {pytest_wrapped_e.value.code}")
-    assert pytest_wrapped_e.value.code == 404
+    assert pytest_wrapped_e.value.code == code
 
 
+@pytest.mark.usefixtures("qapp")
 def test_Worker_DAQ___quit_without_start():
     print_title("Worker_DAQ - quit without start")
 
-    app = create_QApplication()
     qdev = QDeviceIO(FakeDevice())
     qdev.create_worker_DAQ()
 
     tprint("About to quit")
-    app.processEvents()
     assert qdev.quit() is True
-    app.quit()
 
 
+@pytest.mark.usefixtures("qapp")
 def test_Worker_jobs__quit_without_start():
     print_title("Worker_jobs - quit without start")
 
-    app = create_QApplication()
     qdev = QDeviceIO(FakeDevice())
     qdev.create_worker_jobs()
 
     tprint("About to quit")
-    app.processEvents()
     assert qdev.quit() is True
-    app.quit()
 
 
+@pytest.mark.usefixtures("qapp")
 def test_Worker_DAQ___rate():
     print_title("Worker_DAQ - INTERNAL_TIMER - DAQ rate")
 
-    def DAQ_function():
-        # Must return True when successful, False otherwise
-        reply = dev.fake_query_1()
-        dprint(" " * 50 + f"{qdev.obtained_DAQ_rate_Hz:.1f} Hz")
-        return reply[-4:] == "0101"
+    # No console output on every tick, neither from the device nor from the
+    # worker's debug info, as it would add jitter to the very rate being
+    # measured. The debug branches are covered by the other tests.
+    dev = FakeDevice(debug=False)
+    DAQ_function = partial(DAQ_function_query_1, dev)
 
-    app = create_QApplication()
-    dev = FakeDevice()
     qdev = QDeviceIO(dev)
     # fmt: off
     qdev.create_worker_DAQ(
@@ -464,25 +516,26 @@ def test_Worker_DAQ___rate():
         DAQ_function               = DAQ_function,
         DAQ_interval_ms            = 10,
         critical_not_alive_count   = 1,
-        debug                      = DEBUG)
+        debug                      = False)
     # fmt: on
     assert qdev.start() is True
 
-    # Simulate device runtime
-    start_time = time.perf_counter()
-    while time.perf_counter() - start_time < 1.51:
-        app.processEvents()
-        time.sleep(0.001)  # Do not hog the CPU
+    # Simulate device runtime until the first DAQ rate has been evaluated,
+    # which happens once every second
+    run_event_loop(1510, lambda: not math.isnan(qdev.obtained_DAQ_rate_Hz))
 
     tprint("About to quit")
-    app.processEvents()
     assert qdev.quit() is True
-    app.quit()
 
+    dprint(
+        f"Obtained: {qdev.obtained_DAQ_interval_ms} ms, "
+        f"{qdev.obtained_DAQ_rate_Hz:.1f} Hz"
+    )
     assert 9 <= qdev.obtained_DAQ_interval_ms <= 11
     assert 99 <= qdev.obtained_DAQ_rate_Hz <= 101
 
 
+@pytest.mark.usefixtures("qapp")
 def test_Worker_DAQ___lose_connection():
     print_title("Worker_DAQ - INTERNAL_TIMER - lose connection")
 
@@ -491,16 +544,12 @@ def test_Worker_DAQ___lose_connection():
         if qdev.update_counter_DAQ == 10:
             dev.is_alive = False
 
-        reply = dev.fake_query_1()
-        return reply[-4:] == "0101"
+        return dev.fake_query_1().endswith("0101")
 
     @Slot()
     def process_connection_lost():
         tprint("---> received: connection_lost")
-        global go
-        go = False
 
-    app = create_QApplication()
     dev = FakeDevice()
 
     # Forcefully remove members as extra test
@@ -518,18 +567,23 @@ def test_Worker_DAQ___lose_connection():
     # fmt: on
     qdev.create_worker_jobs(debug=DEBUG)
     qdev.signal_connection_lost.connect(process_connection_lost)
-    assert qdev.start() is True
 
-    # Simulate device runtime
-    while go:
-        app.processEvents()
-        time.sleep(0.001)  # Do not hog the CPU
+    # Simulate device runtime until the connection is lost
+    loop = QtCore.QEventLoop()
+    qdev.signal_connection_lost.connect(loop.quit)
+    timeout_timer = QtCore.QTimer()
+    timeout_timer.setSingleShot(True)
+    timeout_timer.timeout.connect(loop.quit)
+
+    assert qdev.start() is True
+    timeout_timer.start(5000)  # Safety timeout
+    loop.exec_()
+    timeout_timer.stop()
+    assert dev.is_alive is False
 
     tprint("About to quit")
-    app.processEvents()
     assert qdev.quit() is True
     assert qdev.quit() is True  # Twice, to check for msg 'already closed'.
-    app.quit()
 
 
 class QDeviceIO_subclassed(QDeviceIO):
@@ -547,7 +601,7 @@ class QDeviceIO_subclassed(QDeviceIO):
         self.create_worker_DAQ(
             DAQ_trigger                = DAQ_TRIGGER.INTERNAL_TIMER,
             DAQ_function               = DAQ_function,
-            DAQ_interval_ms            = 100,
+            DAQ_interval_ms            = 20,
             critical_not_alive_count   = 10,
             debug                      = debug,
         )
@@ -555,48 +609,50 @@ class QDeviceIO_subclassed(QDeviceIO):
         self.create_worker_jobs(debug=debug)
 
 
+@pytest.mark.usefixtures("qapp")
 def test_Worker_DAQ___INTERNAL_TIMER__subclassed():
     print_title("Worker_DAQ - INTERNAL_TIMER - subclassed")
 
-    def DAQ_function():
-        # Must return True when successful, False otherwise
-        reply = dev.fake_query_1()
-        return reply[-4:] == "0101"
-
-    app = create_QApplication()
+    reset_counters()
     dev = FakeDevice()
+    DAQ_function = partial(DAQ_function_query_1, dev)
     qdev = QDeviceIO_subclassed(
         dev=dev,
         DAQ_function=DAQ_function,
         debug=DEBUG,
     )
-    qdev.signal_DAQ_updated.connect(process_DAQ_updated)
-    qdev.signal_jobs_updated.connect(process_jobs_updated)
+    qdev.signal_DAQ_updated.connect(process_DAQ_updated, DIRECT)
+    qdev.signal_jobs_updated.connect(process_jobs_updated, DIRECT)
     qdev.start()
 
     # fmt: off
     # Simulate device runtime
-    start_time = time.perf_counter()
-    QtCore.QTimer.singleShot(300, lambda: qdev.send(dev.fake_query_2))
-    QtCore.QTimer.singleShot(600, lambda: qdev.send(dev.fake_command_with_argument, 0))
+    timer = schedule([
+        (60, partial(qdev.send, dev.fake_query_2)),
+        (120, partial(qdev.send, dev.fake_command_with_argument, 0)),
+    ])
     # fmt: on
-    while time.perf_counter() - start_time < 1:
-        app.processEvents()
-        time.sleep(0.001)  # Do not hog the CPU
+    run_event_loop(
+        200,
+        lambda: (
+            not timer.isActive()
+            and dev.count_commands >= 11
+            and cnt.DAQ_updated >= 9
+        ),
+    )
+    timer.stop()
 
     tprint("About to quit")
-    app.processEvents()
     assert qdev.quit() is True
-    app.quit()
 
     assert dev.count_commands >= 11
     assert dev.count_replies >= 10
-    assert (
-        cnt_DAQ_updated >= 9
-    )  # Last signal is not always received before thread is quit
-    assert cnt_jobs_updated == 2
+    # Two of the commands were jobs, not DAQ updates
+    assert cnt.DAQ_updated == dev.count_commands - 2
+    assert cnt.jobs_updated == 2
 
 
+@pytest.mark.usefixtures("qapp")
 def test_Worker_DAQ___ILLEGAL_DAQ_FUNCTION():
     print_title("Worker_DAQ - ILLEGAL_DAQ_FUNCTION")
 
@@ -606,34 +662,27 @@ def test_Worker_DAQ___ILLEGAL_DAQ_FUNCTION():
         if qdev.update_counter_DAQ == 2:
             raise ZeroDivisionError
 
-        reply = dev.fake_query_1()
-        return reply[-4:] == "0101"
+        return dev.fake_query_1().endswith("0101")
 
-    app = create_QApplication()
+    reset_counters()
     dev = FakeDevice()
+
     qdev = QDeviceIO(dev)
     # fmt: off
     qdev.create_worker_DAQ(
         DAQ_trigger                = DAQ_TRIGGER.INTERNAL_TIMER,
         DAQ_function               = DAQ_function,
-        DAQ_interval_ms            = 100,
+        DAQ_interval_ms            = 20,
         debug                      = DEBUG)
     # fmt: on
-    qdev.signal_DAQ_updated.connect(process_DAQ_updated)
+    qdev.signal_DAQ_updated.connect(process_DAQ_updated, DIRECT)
     assert qdev.start() is True
 
     # Simulate device runtime
-    start_time = time.perf_counter()
-    while time.perf_counter() - start_time < 1:
-        app.processEvents()
-        if dev.count_commands == 3:
-            break
-        time.sleep(0.001)  # Do not hog the CPU
+    run_event_loop(1000, lambda: dev.count_commands >= 3)
 
     tprint("About to quit")
-    app.processEvents()
     assert qdev.quit() is True
-    app.quit()
 
 
 # ------------------------------------------------------------------------------
@@ -641,19 +690,19 @@ def test_Worker_DAQ___ILLEGAL_DAQ_FUNCTION():
 
 
 if __name__ == "__main__":
-    test_Worker_DAQ___INTERNAL_TIMER()
-    test_Worker_DAQ___INTERNAL_TIMER__start_dead()
-    test_Worker_DAQ___SINGLE_SHOT_WAKE_UP()
-    test_Worker_DAQ___SINGLE_SHOT_WAKE_UP__start_dead()
-    test_Worker_DAQ___CONTINUOUS()
-    test_Worker_DAQ___CONTINUOUS__start_dead()
-    test_Worker_jobs()
-    test_Worker_jobs__start_dead()
+    app = create_QApplication()
+
+    test_Worker_DAQ___INTERNAL_TIMER(start_alive=True)
+    test_Worker_DAQ___INTERNAL_TIMER(start_alive=False)
+    test_Worker_DAQ___SINGLE_SHOT_WAKE_UP(start_alive=True)
+    test_Worker_DAQ___SINGLE_SHOT_WAKE_UP(start_alive=False)
+    test_Worker_DAQ___CONTINUOUS(start_alive=True)
+    test_Worker_DAQ___CONTINUOUS(start_alive=False)
+    test_Worker_jobs(start_alive=True)
+    test_Worker_jobs(start_alive=False)
     test_Worker_jobs__jobs_function()
-    test_Worker_DAQ___no_device_attached()
-    test_Worker_jobs__no_device_attached()
-    test_Worker_DAQ___start_without_create()
-    test_Worker_jobs__start_without_create()
+    for case in EARLY_EXIT_CASES:
+        test_early_exit(*case)
     test_Worker_DAQ___quit_without_start()
     test_Worker_jobs__quit_without_start()
     test_Worker_DAQ___rate()